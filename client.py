@@ -1,6 +1,10 @@
-import json
+import atexit
+import logging
+import os
 import sys
-from typing import Any
+from bisect import bisect_left, insort
+from collections import deque
+from typing import TYPE_CHECKING, Any
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -9,6 +13,7 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QTabWidget,
     QTextEdit,
+    QPlainTextEdit,
     QLineEdit,
     QPushButton,
     QListWidget,
@@ -16,36 +21,45 @@ from PyQt5.QtWidgets import (
     QInputDialog,
     QMessageBox,
 )
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QSocketNotifier, QTimer
 import zmq
 
-from private_chat import PrivateChatWindow
-
-
-class ZMQReceiverThread(QThread):
-    message_received = pyqtSignal(dict)
-
-    def __init__(self, sub_addr: str):
-        super().__init__()
-        self.sub_addr = sub_addr
-        self.context = zmq.Context()
-        self.sub = self.context.socket(zmq.SUB)
-        self.sub.connect(self.sub_addr)
-        self.sub.setsockopt_string(zmq.SUBSCRIBE, "")
-
-    def run(self):
-        while True:
-            try:
-                raw = self.sub.recv_string()
-                msg = json.loads(raw)
-                self.message_received.emit(msg)
-            except Exception as e:
-                print(str(e))
-                pass
-
-    def stop(self):
-        self.sub.close()
-        self.context.term()
+from codec import DecodeError, decode, encode
+
+if TYPE_CHECKING:
+    from private_chat import PrivateChatWindow
+
+logger = logging.getLogger(__name__)
+
+# One context for every socket in the process, destroyed at interpreter exit;
+# destroy closes sockets closeEvent never reached, where term would block
+_ctx = zmq.Context.instance()
+atexit.register(lambda: _ctx.destroy(linger=SEND_LINGER_MS))
+
+# (send, receive) endpoints of the provider per transport; ipc skips the
+# loopback TCP stack when the provider runs on the same host
+ENDPOINTS = {
+    "tcp": ("tcp://localhost:6001", "tcp://localhost:6000"),
+    "ipc": ("ipc:///tmp/chat_pub.ipc", "ipc:///tmp/chat_sub.ipc"),
+}
+
+# Queue depth (frames) and kernel buffer size (bytes) for both sockets,
+# large enough to absorb a burst such as a full group refresh
+SOCKET_HWM = 100000
+SOCKET_BUFFER_BYTES = 1 << 20
+# Seconds of idle before TCP keepalive probes start
+TCP_KEEPALIVE_IDLE_S = 30
+# How long closing the send socket may wait to deliver queued frames
+SEND_LINGER_MS = 1000
+# Outbound frames sent within this window of each other are flushed together
+SEND_BATCH_INTERVAL_MS = 2
+SEND_BATCH_SIZE = 50
+# How often queued frames are retried until the provider has subscribed
+SUBSCRIBE_RETRY_MS = 20
+# Upper bound on frames handled per pass before yielding to the event loop
+RECV_BATCH_SIZE = 64
+# Incoming chat lines are rendered at most once per frame (~60 Hz)
+RENDER_INTERVAL_MS = 16
 
 
 class ChatClient(QMainWindow):
@@ -54,20 +68,69 @@ class ChatClient(QMainWindow):
         self.username = username
         self.is_admin = is_admin
         self.groups: dict[str, set[str]] = {}
+        # Sorted copies of self.groups, kept in step by add/remove_member
+        self._sorted_members: dict[str, list[str]] = {}
         self.joined_groups: set[str] = set()
-        self.private_windows: dict[str, PrivateChatWindow] = {}
+        # Name of the selected group tab, None while the placeholder is shown
+        self._current_group: str | None = None
+        self.private_windows: dict[str, "PrivateChatWindow"] = {}
 
         # ZMQ setup
-        self.context = zmq.Context()
-        self.pub = self.context.socket(zmq.PUB)
-        self.pub.connect("tcp://localhost:6001")  # to provider SUB (for sending)
-
-        # Start listening thread
-        self.receiver = ZMQReceiverThread(
-            "tcp://localhost:6000"
-        )  # to provider PUB (for receiving)
-        self.receiver.message_received.connect(self.handle_incoming_message)
-        self.receiver.start()
+        transport = os.environ.get("ZMQ_TRANSPORT", "tcp")
+        if transport not in ENDPOINTS or (transport == "ipc" and not zmq.has("ipc")):
+            transport = "tcp"
+        send_addr, recv_addr = ENDPOINTS[transport]
+        self.context = _ctx
+        # XPUB is wire-compatible with PUB but reports the provider's
+        # subscription, so nothing is sent before the provider can receive it
+        self.pub = self.context.socket(zmq.XPUB)
+        self.pub.setsockopt(zmq.SNDHWM, SOCKET_HWM)
+        self.pub.setsockopt(zmq.SNDBUF, SOCKET_BUFFER_BYTES)
+        self.pub.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        self.pub.setsockopt(zmq.TCP_KEEPALIVE_IDLE, TCP_KEEPALIVE_IDLE_S)
+        self.pub.setsockopt(zmq.IMMEDIATE, 1)
+        self.pub.setsockopt(zmq.LINGER, SEND_LINGER_MS)
+        self.pub.connect(send_addr)  # to provider SUB (for sending)
+        self._pub_ready = False
+
+        # Pre-encoded `{"type":...,"from":...` prefixes for fixed-shape frames
+        self._cmd_prefix = encode({"type": "command", "from": username})[:-1]
+        self._group_msg_prefix = encode(
+            {"type": "message", "from": username}
+        )[:-1]
+
+        # Outbound queue, drained by a short single-shot timer
+        self._outq: deque[bytes] = deque()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(SEND_BATCH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush_outq)
+
+        # Group name -> chat tab, rebuilt by update_group_list
+        self._tab_by_name: dict[str, QPlainTextEdit] = {}
+
+        # Chat lines waiting to be rendered, keyed by tab
+        self._pending_lines: dict[QPlainTextEdit, list[str]] = {}
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(RENDER_INTERVAL_MS)
+        self._render_timer.timeout.connect(self._flush_pending_lines)
+
+        # Receive on the GUI thread: Qt watches the SUB socket's FD
+        self.sub = self.context.socket(zmq.SUB)
+        self.sub.setsockopt(zmq.RCVHWM, SOCKET_HWM)
+        self.sub.setsockopt(zmq.RCVBUF, SOCKET_BUFFER_BYTES)
+        self.sub.setsockopt(zmq.LINGER, 0)
+        self.sub.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        self.sub.setsockopt(zmq.TCP_KEEPALIVE_IDLE, TCP_KEEPALIVE_IDLE_S)
+        self.sub.connect(recv_addr)  # to provider PUB (for receiving)
+        self.sub.setsockopt_string(zmq.SUBSCRIBE, "")
+        self._notifier = QSocketNotifier(
+            self.sub.getsockopt(zmq.FD), QSocketNotifier.Read, self
+        )
+        self._notifier.activated.connect(self._drain_sub)
+        # Frames may already be queued before the first edge is seen
+        QTimer.singleShot(0, self._drain_sub)
         self.member_list=[]
 
         self.init_ui()
@@ -131,20 +194,56 @@ class ChatClient(QMainWindow):
 
         main_layout.addLayout(bottom_layout)
 
-        # Initial group list refresh
-        self.refresh_groups()
-
     def refresh_groups(self):
         self.send_command("refresh")
 
+    def _enqueue(self, frame: bytes) -> None:
+        """Send a frame now if the socket is idle, otherwise batch it."""
+        self._check_subscribed()
+        if self._pub_ready and not self._outq and not self._flush_timer.isActive():
+            self.pub.send(frame, copy=False)
+            self._flush_timer.start(SEND_BATCH_INTERVAL_MS)
+            return
+
+        self._outq.append(frame)
+        if len(self._outq) >= SEND_BATCH_SIZE:
+            self._flush_outq()
+        elif not self._flush_timer.isActive():
+            self._flush_timer.start(SEND_BATCH_INTERVAL_MS)
+
+    def _flush_outq(self) -> None:
+        """Drain every queued frame in one go."""
+        self._check_subscribed()
+        if not self._pub_ready:
+            # Nobody is listening yet; a PUB socket would drop these
+            self._flush_timer.start(SUBSCRIBE_RETRY_MS)
+            return
+        while self._outq:
+            self.pub.send(self._outq.popleft(), copy=False)
+
+    def _check_subscribed(self) -> None:
+        """Read pending XPUB (un)subscription frames from the provider's SUB.
+
+        The provider unsubscribes when it disconnects, so sending is held
+        again until it has reconnected and subscribed.
+        """
+        while self.pub.poll(0, zmq.POLLIN):
+            kind = self.pub.recv()[:1]
+            if kind == b"\x01":
+                self._pub_ready = True
+            elif kind == b"\x00":
+                self._pub_ready = False
+
     def send_command(self, action: str, group: str = ""):
-        msg = {
-            "type": "command",
-            "from": self.username,
-            "action": action,
-            "group": group,
-        }
-        self.pub.send_string(json.dumps(msg))
+        # Values go through encode() so user input is escaped as JSON strings
+        self._enqueue(
+            self._cmd_prefix
+            + b',"action":'
+            + encode(action)
+            + b',"group":'
+            + encode(group)
+            + b"}"
+        )
 
     def create_group(self) -> None:
         group, ok = QInputDialog.getText(self, "Create Group", "Group name:")
@@ -162,7 +261,8 @@ class ChatClient(QMainWindow):
     def on_group_tab_changed(self, index: int):
         if index >= 0:
             group_name = self.group_tabs.tabText(index)
-            print(f"group name ============> {group_name}")
+            logger.debug("Switched to group tab %s", group_name)
+            self._current_group = group_name if group_name != "No Groups" else None
             if group_name != "No Groups":
                 self.member_list.clear()
                 self.member_list.addItem("Join group to see members")
@@ -172,38 +272,54 @@ class ChatClient(QMainWindow):
     def update_member_list(self, group_name: str):
         self.member_list.clear()
         if group_name in self.groups:
-            for member in sorted(self.groups[group_name]):
+            for member in self.sorted_members(group_name):
                 self.member_list.addItem(member)
 
+    def sorted_members(self, group_name: str) -> list[str]:
+        """Return the group's members sorted; sorted once per refresh."""
+        members = self._sorted_members.get(group_name)
+        if members is None:
+            members = sorted(self.groups[group_name])
+            self._sorted_members[group_name] = members
+        return members
+
+    def add_member(self, group_name: str, user: str) -> None:
+        members = self.groups[group_name]
+        if user in members:
+            return
+        members.add(user)
+        if group_name in self._sorted_members:
+            insort(self._sorted_members[group_name], user)
+
+    def remove_member(self, group_name: str, user: str) -> None:
+        members = self.groups[group_name]
+        if user not in members:
+            return
+        members.discard(user)
+        if group_name in self._sorted_members:
+            ordered = self._sorted_members[group_name]
+            del ordered[bisect_left(ordered, user)]
+
     def join_current_group(self):
-        current_index = self.group_tabs.currentIndex()
-        if current_index >= 0:
-            current = self.group_tabs.tabText(current_index)
-            if current and current != "No Groups":
-                if current not in self.joined_groups:
-                    self.send_command("join", current)
-                    # Update member list immediately after joining
-                    self.update_member_list(current)
-                else:
-                    QMessageBox.information(self, "Info", "Already joined this group.")
+        current = self._current_group
+        if current:
+            if current not in self.joined_groups:
+                self.send_command("join", current)
+                # Update member list immediately after joining
+                self.update_member_list(current)
+            else:
+                QMessageBox.information(self, "Info", "Already joined this group.")
 
     def leave_current_group(self):
-        current_index = self.group_tabs.currentIndex()
-        if current_index >= 0:
-            current = self.group_tabs.tabText(current_index)
-            if current in self.joined_groups:
-                self.send_command("leave", current)
-            else:
-                QMessageBox.information(self, "Info", "You haven't joined this group.")
+        current = self._current_group
+        if current in self.joined_groups:
+            self.send_command("leave", current)
+        else:
+            QMessageBox.information(self, "Info", "You haven't joined this group.")
 
     def send_group_message(self):
-        current_index = self.group_tabs.currentIndex()
-        if current_index < 0:
-            QMessageBox.warning(self, "Error", "Select a group first.")
-            return
-
-        current = self.group_tabs.tabText(current_index)
-        if not current or current == "No Groups":
+        current = self._current_group
+        if not current:
             QMessageBox.warning(
                 self,
                 "Error",
@@ -221,17 +337,18 @@ class ChatClient(QMainWindow):
 
         msg_text = self.message_input.text().strip()
         if msg_text:
-            msg = {
-                "type": "message",
-                "from": self.username,
-                "group": current,
-                "data": msg_text,
-            }
-            self.pub.send_string(json.dumps(msg))
+            self._enqueue(
+                self._group_msg_prefix
+                + b',"group":'
+                + encode(current)
+                + b',"data":'
+                + encode(msg_text)
+                + b"}"
+            )
             # Echo locally
-            tab = self.group_tabs.currentWidget()
+            tab = self.find_tab_by_name(current)
             if tab:
-                tab.append(f"You: {msg_text}")
+                self.append_line(tab, f"You: {msg_text}")
             self.message_input.clear()
 
     def start_private_chat(self, item: Any):
@@ -241,13 +358,20 @@ class ChatClient(QMainWindow):
             return
 
         if target not in self.private_windows:
-            win = PrivateChatWindow(self.username, target)
-            win.send_message.connect(self.send_private_message)
-            win.show()
-            self.private_windows[target] = win
+            self.open_private_window(target)
         else:
             self.private_windows[target].activateWindow()
 
+    def open_private_window(self, target: str) -> "PrivateChatWindow":
+        # Imported here so the private chat widgets load only once needed
+        from private_chat import PrivateChatWindow
+
+        win = PrivateChatWindow(self.username, target)
+        win.send_message.connect(self.send_private_message)
+        win.show()
+        self.private_windows[target] = win
+        return win
+
     def send_private_message(self, from_user: str, to_user: str, message: str):
         msg = {
             "type": "message",
@@ -255,15 +379,50 @@ class ChatClient(QMainWindow):
             "to": to_user,
             "data": message,
         }
-        self.pub.send_string(json.dumps(msg))
+        self._enqueue(encode(msg))
+
+    def _drain_sub(self) -> None:
+        """Handle the frames queued on the SUB socket, RECV_BATCH_SIZE at a time."""
+        if self.sub.closed:
+            return  # A deferred pass scheduled before closeEvent
+        for _ in range(RECV_BATCH_SIZE):
+            frame = self._recv_ready()
+            if frame is None:
+                return
+            try:
+                msg = decode(frame.buffer)
+            except DecodeError:
+                continue  # Drop malformed frames
+            if not isinstance(msg, dict):
+                continue  # Valid JSON, but not a message object
+            if msg.get("to", self.username) != self.username:
+                continue  # Addressed to someone else
+            self.handle_incoming_message(msg)
+        # Let the event loop breathe, then carry on draining
+        QTimer.singleShot(0, self._drain_sub)
+
+    def _recv_ready(self) -> zmq.Frame | None:
+        """Return the next queued SUB frame, or None when there is none."""
+        # zmq.FD is edge-triggered: keep reading while zmq.EVENTS reports
+        # POLLIN, since queued frames will not wake the notifier again
+        try:
+            if not self.sub.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                return None
+            return self.sub.recv(zmq.NOBLOCK, copy=False)
+        except zmq.ContextTerminated:
+            self._notifier.setEnabled(False)
+        except zmq.ZMQError:
+            # An exception escaping a Qt slot would abort the application
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("SUB receive failed", exc_info=True)
+            # zmq.EVENTS was already read, so the notifier may not fire again
+            QTimer.singleShot(0, self._drain_sub)
+        return None
 
     def handle_incoming_message(self, msg: dict):
         mtype = msg.get("type")
 
         if mtype == "event":
-            if "to" in msg and msg["to"] != self.username:
-                return  # Not for us
-
             # Handle group list refresh
             if "groups" in msg:
                 groups_data = msg.get("groups", {})
@@ -271,10 +430,22 @@ class ChatClient(QMainWindow):
                     self.groups = {
                         g: set(members) for g, members in groups_data.items()
                     }
+                    self._sorted_members.clear()
                     group_names = list(self.groups.keys())
                     self.update_group_list(group_names)
                 return  # No need to process further
 
+            # Membership events with explicit fields skip the text parsing
+            action = msg.get("action")
+            if action in ("joined", "left") and "user" in msg and "group" in msg:
+                self.apply_membership(action, msg["user"], msg["group"])
+                QMessageBox.information(
+                    self,
+                    "Event",
+                    msg.get("data") or f"{msg['user']} {action} {msg['group']}.",
+                )
+                return
+
             # Handle text events (created, joined, left, etc.)
             data = msg.get("data", "")
             if not data:
@@ -284,25 +455,14 @@ class ChatClient(QMainWindow):
                 self.refresh_groups()  # Re-fetch updated list
                 QMessageBox.information(self, "Event", data)
             elif "joined" in data or "left" in data:
+                # Older providers only send "<user> joined <group>." text
                 parts = data.split()
                 if len(parts) >= 3:
-                    user = parts[0]
-                    group = parts[2].rstrip(".")
-                    if group in self.groups:
-                        if "joined" in data:
-                            self.groups[group].add(user)
-                            if user == self.username:
-                                self.joined_groups.add(group)
-                        elif "left" in data:
-                            self.groups[group].discard(user)
-                            if user == self.username:
-                                self.joined_groups.discard(group)
-                        # Update member list if this is the current group
-                        current_index = self.group_tabs.currentIndex()
-                        if current_index >= 0:
-                            current = self.group_tabs.tabText(current_index)
-                            if current == group:
-                                self.update_member_list(group)
+                    self.apply_membership(
+                        "joined" if "joined" in data else "left",
+                        parts[0],
+                        parts[2].rstrip("."),
+                    )
                 QMessageBox.information(self, "Event", data)
 
         elif mtype == "message":
@@ -313,10 +473,7 @@ class ChatClient(QMainWindow):
                 # Check if we already have a window for this sender
                 if sender not in self.private_windows:
                     # Create new window if it doesn't exist
-                    win = PrivateChatWindow(self.username, sender)
-                    win.send_message.connect(self.send_private_message)
-                    win.show()
-                    self.private_windows[sender] = win
+                    self.open_private_window(sender)
 
                 # Deliver message to existing window
                 self.private_windows[sender].receive_message(sender, content)
@@ -324,22 +481,40 @@ class ChatClient(QMainWindow):
                 group = msg.get("group", "")
                 sender = msg.get("from", "")
                 content = msg.get("data", "")
-                if group in self.get_all_group_names():
-                    tab = self.find_tab_by_name(group)
-                    if tab:
-                        tab.append(f"{sender}: {content}")
+                tab = self.find_tab_by_name(group)
+                if tab:
+                    self.append_line(tab, f"{sender}: {content}")
+
+    def apply_membership(self, action: str, user: str, group: str) -> None:
+        if group not in self.groups:
+            return
+        if action == "joined":
+            self.add_member(group, user)
+            if user == self.username:
+                self.joined_groups.add(group)
+        else:
+            self.remove_member(group, user)
+            if user == self.username:
+                self.joined_groups.discard(group)
+        # Update member list if this is the current group
+        if self._current_group == group:
+            self.update_member_list(group)
 
     def update_group_list(self, group_names: list):
         current_index = self.group_tabs.currentIndex()
 
-        # Rebuild tabs
+        # Rebuild tabs without firing currentChanged for every tab added
+        self.group_tabs.blockSignals(True)
         self.group_tabs.clear()
+        self._tab_by_name.clear()
+        self._pending_lines.clear()
 
         if group_names:
             for name in sorted(group_names):
-                chat_display = QTextEdit()
+                chat_display = QPlainTextEdit()
                 chat_display.setReadOnly(True)
                 self.group_tabs.addTab(chat_display, name)
+                self._tab_by_name[name] = chat_display
         else:
             # Add placeholder if no groups
             self.group_tabs.addTab(self.group_placeholder, "No Groups")
@@ -347,39 +522,47 @@ class ChatClient(QMainWindow):
         # Restore previous tab selection if possible
         if current_index >= 0 and current_index < self.group_tabs.count():
             self.group_tabs.setCurrentIndex(current_index)
+        self.group_tabs.blockSignals(False)
 
         # Trigger UI update
         self.group_tabs.update()
 
+        # Signals were blocked above, so record the selection here
+        current_index = self.group_tabs.currentIndex()
+        current = self.group_tabs.tabText(current_index) if current_index >= 0 else ""
+        self._current_group = current if current and current != "No Groups" else None
+
         # Trigger member list update
-        if self.group_tabs.count() > 0:
-            current_index = self.group_tabs.currentIndex()
-            if current_index >= 0:
-                current = self.group_tabs.tabText(current_index)
-                if current != "No Groups":
-                    self.update_member_list(current)
-                else:
-                    self.member_list.clear()
+        if self._current_group is not None:
+            self.update_member_list(self._current_group)
+        elif self.group_tabs.count() > 0:
+            self.member_list.clear()
+
+    def append_line(self, tab: QPlainTextEdit, text: str) -> None:
+        """Queue a chat line for the tab; lines are rendered together."""
+        self._pending_lines.setdefault(tab, []).append(text)
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+
+    def _flush_pending_lines(self) -> None:
+        for tab, lines in self._pending_lines.items():
+            tab.appendPlainText("\n".join(lines))
+        self._pending_lines.clear()
 
     def get_all_group_names(self):
-        return [
-            self.group_tabs.tabText(i)
-            for i in range(self.group_tabs.count())
-            if self.group_tabs.tabText(i) != "No Groups"
-        ]
+        return self._tab_by_name.keys()
 
     def find_tab_by_name(self, name: str):
-        for i in range(self.group_tabs.count()):
-            if self.group_tabs.tabText(i) == name:
-                return self.group_tabs.widget(i)
-        return None
+        return self._tab_by_name.get(name)
 
     def closeEvent(self, event):
         for group in list(self.joined_groups):
             self.send_command("leave", group)
-        self.receiver.stop()
+        self._flush_outq()
+        self._flush_timer.stop()
+        self._notifier.setEnabled(False)
+        self.sub.close()
         self.pub.close()
-        self.context.term()
         event.accept()
 
 
@@ -0,0 +1,40 @@
+"""JSON encoding shared by the ZMQ wire format and the database layer."""
+
+import json
+from datetime import date
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError, json.JSONDecodeError and the UnicodeDecodeError
+# json.loads raises on invalid UTF-8 all subclass this, so one except
+# clause covers every backend
+DecodeError = ValueError
+
+if orjson is not None:
+    encode = orjson.dumps
+    decode = orjson.loads
+else:
+
+    def _default(obj: Any) -> Any:
+        # Match orjson, which writes datetimes as ISO 8601 strings
+        if isinstance(obj, date):
+            return obj.isoformat()
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+    _encoder = json.JSONEncoder(
+        separators=(",", ":"), ensure_ascii=False, default=_default
+    )
+
+    def encode(obj: Any) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes."""
+        return _encoder.encode(obj).encode()
+
+    def decode(data: Any) -> Any:
+        """Parse JSON from bytes, bytearray, memoryview or str."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
@@ -1,15 +1,121 @@
 import os
-import psycopg2
+import threading
+import time
 from typing import Any
-import json
-from psycopg2 import OperationalError
+from psycopg import OperationalError
+from psycopg.pq import TransactionStatus
+from psycopg_pool import ConnectionPool
 import logging
-from psycopg2 import sql
 
-from copy import deepcopy
+from codec import encode
+
+__all__ = ["DataBase"]
 
 logger = logging.getLogger(__name__)
 
+# Connections kept open per database, and the most handed out at once
+POOL_MIN_CONN = 2
+POOL_MAX_CONN = 32
+# Seconds a cached is_user_admin answer stays valid
+ADMIN_CACHE_TTL = 60.0
+# Rows per round trip when streaming history from a server-side cursor
+HISTORY_FETCH_SIZE = 2000
+
+# Hot statements psycopg prepares server-side on each connection's first use
+PREPARED_STATEMENTS: dict[str, str] = {
+    "get_user_id": "SELECT id FROM users WHERE username = %s",
+    "get_group_id": "SELECT id FROM groups WHERE name = %s",
+    "is_user_admin": "SELECT is_admin FROM users WHERE username = %s",
+    "add_group_chat": (
+        "INSERT INTO group_chat (user_id, group_id, message) "
+        "VALUES (%s, %s, %s) RETURNING id"
+    ),
+}
+
+USERS_DDL = """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY NOT NULL,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        is_admin BOOLEAN NOT NULL,
+        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        pv JSONB DEFAULT '[]'::jsonb
+    )
+"""
+
+# Tables created before users.pv had a default: set it, backfill NULLs and
+# index the legacy history for containment (@>) searches
+USERS_PV_DDL = (
+    "ALTER TABLE users ALTER COLUMN pv SET DEFAULT '[]'::jsonb",
+    "UPDATE users SET pv = '[]'::jsonb WHERE pv IS NULL",
+    "CREATE INDEX IF NOT EXISTS users_pv_gin ON users USING gin (pv jsonb_path_ops)",
+)
+
+GROUPS_DDL = """
+    CREATE TABLE IF NOT EXISTS groups (
+        id SERIAL PRIMARY KEY NOT NULL,
+        name VARCHAR(50) UNIQUE NOT NULL
+    )
+"""
+
+GROUP_CHAT_DDL = """
+    CREATE TABLE IF NOT EXISTS group_chat (
+        id SERIAL PRIMARY KEY NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+        message TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+GROUP_MEMBERS_DDL = """
+    CREATE TABLE IF NOT EXISTS group_members (
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE SET NULL,
+        group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+        PRIMARY KEY (user_id, group_id)
+    )
+"""
+
+PRIVATE_MESSAGES_DDL = """
+    CREATE TABLE IF NOT EXISTS private_messages (
+        id SERIAL PRIMARY KEY NOT NULL,
+        sender_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        receiver_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        message TEXT,
+        ts TIMESTAMPTZ DEFAULT now()
+    )
+"""
+
+# ts is the transaction start time, so rows written in one batch share it;
+# id breaks the tie and keeps them in insertion order
+PRIVATE_MESSAGES_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS private_messages_receiver_ts_id_idx
+    ON private_messages (receiver_id, sender_id, ts DESC, id DESC)
+"""
+# Superseded by private_messages_receiver_ts_id_idx
+PRIVATE_MESSAGES_OLD_INDEX_DDL = "DROP INDEX IF EXISTS private_messages_receiver_idx"
+
+# Run in this order by init_schema (foreign keys need their targets first)
+SCHEMA_DDL = (
+    USERS_DDL,
+    *USERS_PV_DDL,
+    GROUPS_DDL,
+    GROUP_CHAT_DDL,
+    GROUP_MEMBERS_DDL,
+    PRIVATE_MESSAGES_DDL,
+    PRIVATE_MESSAGES_INDEX_DDL,
+    PRIVATE_MESSAGES_OLD_INDEX_DDL,
+)
+# Relations whose presence means SCHEMA_DDL has already been applied
+SCHEMA_RELATIONS = (
+    "users",
+    "users_pv_gin",
+    "groups",
+    "group_chat",
+    "group_members",
+    "private_messages",
+    "private_messages_receiver_ts_id_idx",
+)
+
 
 class DataBase:
     def __init__(self):
@@ -19,24 +125,96 @@ class DataBase:
             "password": os.environ.get("PASSWORD"),
             "port": 5432,
         }
+        # Connection parameters for every database this class talks to
+        self._params_by_db: dict[str | None, dict[str, Any]] = {
+            None: self.conn_params,
+            "postgres": {**self.conn_params, "dbname": "postgres"},
+            "chat": {**self.conn_params, "dbname": "chat"},
+        }
+        # One pool per database name, created on first use
+        self._pools: dict[str | None, ConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+        # id(conn) -> pool it was checked out from
+        self._checked_out: dict[int, ConnectionPool] = {}
+        # Name -> id lookups; ids never change, so only removals invalidate
+        self._user_id_cache: dict[str, int] = {}
+        self._group_id_cache: dict[str, int] = {}
+        # Username -> (is_admin, monotonic expiry)
+        self._admin_cache: dict[str, tuple[bool, float]] = {}
+
+    def _get_pool(self, database: str | None) -> ConnectionPool:
+        """Return the connection pool for database, creating it if needed."""
+        with self._pools_lock:
+            pool = self._pools.get(database)
+            if pool is None:
+                params = self._params_by_db.get(database)
+                if params is None:
+                    params = {**self.conn_params, "dbname": database}
+                pool = ConnectionPool(
+                    kwargs=params,
+                    min_size=POOL_MIN_CONN,
+                    max_size=POOL_MAX_CONN,
+                    open=True,
+                )
+                self._pools[database] = pool
+            return pool
 
     def _get_connection(
         self,
         database: str = None,
         autocommit: bool = False,
     ) -> Any:
-        """Helper method to create a connection with optional database and autocommit."""
-        params = deepcopy(self.conn_params)
-        if database:
-            params["database"] = database
-        conn = psycopg2.connect(**params)
+        """Check a pooled connection out with optional database and autocommit.
+
+        Every connection must be handed back with `_put_connection`.
+        """
+        try:
+            pool = self._get_pool(database)
+            conn = pool.getconn()
+        except OperationalError as e:
+            logger.debug(msg=str(e))
+            raise e
         conn.autocommit = autocommit
+        self._checked_out[id(conn)] = pool
         return conn
 
+    def _put_connection(self, conn: Any) -> None:
+        """Return a connection to its pool; open transactions are rolled back."""
+        pool = self._checked_out.pop(id(conn))
+        # Read-only methods leave their transaction open, and failed ones
+        # leave it aborted; end it quietly rather than have the pool warn
+        if conn.info.transaction_status in (
+            TransactionStatus.INTRANS,
+            TransactionStatus.INERROR,
+        ):
+            conn.rollback()
+        pool.putconn(conn)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._pools_lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+    @staticmethod
+    def _execute_prepared(cursor: Any, name: str, params: tuple) -> None:
+        """Run a PREPARED_STATEMENTS entry as a server-side prepared statement."""
+        cursor.execute(PREPARED_STATEMENTS[name], params, prepare=True)
+
+    @staticmethod
+    def _forget_id(cache: dict[str, int], row_id: int) -> None:
+        """Drop every cached name that maps to row_id."""
+        for name in [name for name, cached in cache.items() if cached == row_id]:
+            del cache[name]
+
     def create_db(self) -> None:
         """Create the chat database if it doesn't exist."""
+        # Only needed here, once per deployment
+        from psycopg import sql
+
+        conn = self._get_connection(database="postgres", autocommit=True)
         try:
-            conn = self._get_connection(database="postgres", autocommit=True)
             cursor = conn.cursor()
 
             cursor.execute(
@@ -54,117 +232,160 @@ class DataBase:
                     sql.SQL("CREATE DATABASE {}").format(sql.Identifier("chat"))
                 )
 
-        except psycopg2.OperationalError as e:
+        except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
-    def create_user_table(self) -> None:
-        """Create the user table with necessary columns."""
+    def _execute_ddl(self, *statements: str) -> None:
+        """Run DDL statements on the chat database in autocommit mode."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY NOT NULL,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    is_admin BOOLEAN NOT NULL,
-                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    pv JSONB
-                )
-            """)
+            for statement in statements:
+                cursor.execute(statement)
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
-    def create_group_table(self) -> None:
+    def init_schema(self) -> None:
+        """Create every table and index in one transaction.
+
+        Does nothing beyond a catalog lookup when the schema already exists.
+        """
+        conn = self._get_connection(database="chat")
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS groups (
-                    id SERIAL PRIMARY KEY NOT NULL,
-                    name VARCHAR(50) UNIQUE NOT NULL
-                )
-            """)
+            cursor.execute(
+                """
+                SELECT COUNT(*)
+                FROM pg_class
+                WHERE relnamespace = 'public'::regnamespace
+                  AND relname::text = ANY(%s)
+            """,
+                (list(SCHEMA_RELATIONS),),
+            )
+            if cursor.fetchone()[0] == len(SCHEMA_RELATIONS):
+                return
+            cursor.execute(";\n".join(SCHEMA_DDL))
+            conn.commit()
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
-    def create_group_chat_table(self):
+    def create_user_table(self) -> None:
+        """Create the user table with necessary columns.
+
+        The pv migration only runs while its GIN index is still missing.
+        """
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS group_chat (
-                    id SERIAL PRIMARY KEY NOT NULL,
-                    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                    group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
-                    message TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            cursor.execute(USERS_DDL)
+            cursor.execute(
+                """
+                SELECT 1
+                FROM pg_class
+                WHERE relnamespace = 'public'::regnamespace
+                  AND relname = 'users_pv_gin'
+            """
+            )
+            if cursor.fetchone() is None:
+                for statement in USERS_PV_DDL:
+                    cursor.execute(statement)
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
+
+    def create_group_table(self) -> None:
+        self._execute_ddl(GROUPS_DDL)
+
+    def create_group_chat_table(self):
+        self._execute_ddl(GROUP_CHAT_DDL)
 
     def create_group_members_table(self) -> None:
         """Create the group_members table to track memberships."""
-        try:
-            conn = self._get_connection(database="chat", autocommit=True)
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS group_members (
-                    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE SET NULL,
-                    group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
-                    PRIMARY KEY (user_id, group_id)
-                )
-            """)
-        except OperationalError as e:
-            logger.debug(msg=str(e))
-            raise e
+        self._execute_ddl(GROUP_MEMBERS_DDL)
+
+    def create_private_chat_table(self) -> None:
+        """Create the private_messages table; users.pv is kept for old history only."""
+        self._execute_ddl(
+            PRIVATE_MESSAGES_DDL,
+            PRIVATE_MESSAGES_INDEX_DDL,
+            PRIVATE_MESSAGES_OLD_INDEX_DDL,
+        )
 
     def get_user_id(self, username: str) -> int | None:
         """Get user ID by username."""
+        if username in self._user_id_cache:
+            return self._user_id_cache[username]
+        conn = self._get_connection(database="chat")
         try:
-            conn = self._get_connection(database="chat")
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+            self._execute_prepared(cursor, "get_user_id", (username,))
             result = cursor.fetchone()
-            return result[0] if result else None
+            if result is None:
+                return None
+            self._user_id_cache[username] = result[0]
+            return result[0]
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def get_group_id(self, name: str) -> int | None:
         """Get group ID by name."""
+        if name in self._group_id_cache:
+            return self._group_id_cache[name]
+        conn = self._get_connection(database="chat")
         try:
-            conn = self._get_connection(database="chat")
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM groups WHERE name = %s", (name,))
+            self._execute_prepared(cursor, "get_group_id", (name,))
             result = cursor.fetchone()
-            return result[0] if result else None
+            if result is None:
+                return None
+            self._group_id_cache[name] = result[0]
+            return result[0]
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def is_user_admin(self, username: str) -> bool:
         """Check if a user is admin by username."""
+        cached = self._admin_cache.get(username)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        conn = self._get_connection(database="chat")
         try:
-            conn = self._get_connection(database="chat")
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT is_admin FROM users WHERE username = %s", (username,)
-            )
+            self._execute_prepared(cursor, "is_user_admin", (username,))
             result = cursor.fetchone()
-            return result[0] if result else False
+            is_admin = result[0] if result else False
+            self._admin_cache[username] = (
+                is_admin,
+                time.monotonic() + ADMIN_CACHE_TTL,
+            )
+            return is_admin
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def add_member_to_group(self, user_id: int, group_id: int) -> bool:
         """Add a user to a group (idempotent)."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -178,11 +399,13 @@ class DataBase:
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def remove_member_from_group(self, user_id: int, group_id: int) -> bool:
         """Remove a user from a group."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -195,48 +418,72 @@ class DataBase:
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def get_all_groups_with_members(self) -> dict[str, set[str]]:
         """Load all groups with their member usernames."""
-        groups = {}
+        conn = self._get_connection(database="chat")
         try:
-            conn = self._get_connection(database="chat")
             cursor = conn.cursor()
-            cursor.execute("SELECT name FROM groups")
-
-            # Refactor the `for` loop using `map` function
-            group_names = cursor.fetchall()
-            groups = dict(map(lambda name: (name[0], set()), group_names))
-
+            # LEFT JOINs keep groups without members as empty arrays
             cursor.execute("""
-                SELECT g.name, u.username
-                FROM group_members gm
-                JOIN groups g ON gm.group_id = g.id
-                JOIN users u ON gm.user_id = u.id
+                SELECT g.name,
+                       COALESCE(
+                           array_agg(u.username) FILTER (WHERE u.username IS NOT NULL),
+                           '{}'
+                       )
+                FROM groups g
+                LEFT JOIN group_members gm ON gm.group_id = g.id
+                LEFT JOIN users u ON u.id = gm.user_id
+                GROUP BY g.name
             """)
-            for group_name, uname in cursor.fetchall():
-                groups[group_name].add(uname)
-            return groups
+            return {name: set(members) for name, members in cursor.fetchall()}
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
-    def get_group_messages(self, group_id: int, limit: int = 50) -> list[dict]:
-        """Get recent messages for a group (for history fetching)."""
-        try:
-            conn = self._get_connection(database="chat")
-            cursor = conn.cursor()
-            cursor.execute(
-                """
+    def get_group_messages(
+        self,
+        group_id: int,
+        limit: int = 50,
+        as_json: bool = False,
+    ) -> list[dict] | bytes:
+        """Get recent messages for a group (for history fetching).
+
+        With `as_json` the rows are streamed from a server-side cursor and
+        returned as an encoded JSON array, ready to be sent as one frame.
+        """
+        query = """
                 SELECT u.username, gc.message, gc.timestamp
                 FROM group_chat gc
                 JOIN users u ON gc.user_id = u.id
                 WHERE gc.group_id = %s
                 ORDER BY gc.timestamp DESC
                 LIMIT %s
-            """,
-                (group_id, limit),
-            )
+            """
+        conn = self._get_connection(database="chat")
+        try:
+            if as_json:
+                # Closed before _put_connection ends its transaction
+                with conn.cursor(name="group_messages") as cursor:
+                    cursor.itersize = HISTORY_FETCH_SIZE
+                    cursor.execute(query, (group_id, limit))
+                    return (
+                        b"["
+                        + b",".join(
+                            encode(
+                                {"from": row[0], "data": row[1], "timestamp": row[2]}
+                            )
+                            for row in cursor
+                        )
+                        + b"]"
+                    )
+
+            cursor = conn.cursor()
+            cursor.execute(query, (group_id, limit))
             return [
                 {"from": row[0], "data": row[1], "timestamp": row[2]}
                 for row in cursor.fetchall()
@@ -244,52 +491,88 @@ class DataBase:
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
-    def add_user(self, username: str, is_admin: bool = False) -> int:
-        """Add a new user to the users table and return the user ID."""
+    def get_private_messages(
+        self,
+        user_a: int,
+        user_b: int,
+        limit: int = 50,
+    ) -> list[dict]:
+        """Get recent private messages exchanged between two users."""
+        conn = self._get_connection(database="chat")
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
-
             cursor.execute(
-                """SELECT id FROM users WHERE username = %s""",
-                (username,),
+                """
+                SELECT s.username, r.username, pm.message, pm.ts
+                FROM private_messages pm
+                JOIN users s ON pm.sender_id = s.id
+                JOIN users r ON pm.receiver_id = r.id
+                WHERE (pm.receiver_id = %s AND pm.sender_id = %s)
+                   OR (pm.receiver_id = %s AND pm.sender_id = %s)
+                ORDER BY pm.ts DESC, pm.id DESC
+                LIMIT %s
+            """,
+                (user_a, user_b, user_b, user_a, limit),
             )
-            existing_user = cursor.fetchone()
-
-            if existing_user is not None:
-                return existing_user[0]
-
-            cursor.execute("""SELECT COUNT(*) FROM users""")
-            user_count = cursor.fetchone()[0]
+            return [
+                {"from": row[0], "to": row[1], "data": row[2], "timestamp": row[3]}
+                for row in cursor.fetchall()
+            ]
+        except OperationalError as e:
+            logger.debug(msg=str(e))
+            raise e
+        finally:
+            self._put_connection(conn)
 
-            if user_count == 0:
-                is_admin = True
+    def add_user(self, username: str, is_admin: bool = False) -> int:
+        """Add a new user to the users table and return the user ID.
 
+        Existing users keep their row and get their ID back; the very first
+        user is always made an admin.
+        """
+        conn = self._get_connection(database="chat", autocommit=True)
+        try:
+            cursor = conn.cursor()
+            # The no-op DO UPDATE makes RETURNING yield the existing id too
             cursor.execute(
-                """INSERT INTO users (username, is_admin) VALUES (%s, %s) RETURNING id""",
+                """
+                INSERT INTO users (username, is_admin)
+                SELECT %s, %s OR NOT EXISTS (SELECT 1 FROM users)
+                ON CONFLICT (username) DO UPDATE SET username = EXCLUDED.username
+                RETURNING id
+            """,
                 (username, is_admin),
             )
-            new_user_id = cursor.fetchone()[0]
+            user_id = cursor.fetchone()[0]
+            self._user_id_cache[username] = user_id
+            self._admin_cache.pop(username, None)
 
-            return new_user_id
+            return user_id
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def add_group(self, name: str) -> int:
         """Add a new group to the groups table and return the group ID."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO groups (name) VALUES (%s) RETURNING id", (name,)
             )
             group_id = cursor.fetchone()[0]
+            self._group_id_cache[name] = group_id
             return group_id
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def add_user_to_group_chat(
         self,
@@ -298,18 +581,19 @@ class DataBase:
         message: str,
     ) -> int:
         """Add a new message from a user to a group chat and return the message ID."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO group_chat (user_id, group_id, message) VALUES (%s, %s, %s) RETURNING id",
-                (user_id, group_id, message),
+            self._execute_prepared(
+                cursor, "add_group_chat", (user_id, group_id, message)
             )
             message_id = cursor.fetchone()[0]
             return message_id
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def add_message_to_group_chat(
         self,
@@ -326,56 +610,54 @@ class DataBase:
         receiver_id: int,
         message: str,
     ) -> bool:
-        """Add a private message to the pv field of a user."""
+        """Add a private message to the private_messages table."""
+        return self.add_private_messages([(sender_id, receiver_id, message)])
+
+    def add_private_messages(self, rows: list[tuple[int, int, str]]) -> bool:
+        """Insert a batch of (sender_id, receiver_id, message) rows."""
+        if not rows:
+            return True
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
-            # Create the message object
-            message_obj = {
-                "sender_id": sender_id,
-                "receiver_id": receiver_id,
-                "message": message,
-                "timestamp": "NOW()",
-            }
-
-            # Convert to JSON string
-            message_json = json.dumps(message_obj)
-
-            # Update the receiver's pv field
-            cursor.execute(
-                "UPDATE users SET pv = COALESCE(pv, '[]'::jsonb) || %s::jsonb WHERE id = %s",
-                (message_json, receiver_id),
+            # executemany pipelines the inserts: one round trip per batch
+            cursor.executemany(
+                "INSERT INTO private_messages (sender_id, receiver_id, message) "
+                "VALUES (%s, %s, %s)",
+                rows,
             )
-
-            # Also update the sender's pv field if needed
-            cursor.execute(
-                "UPDATE users SET pv = COALESCE(pv, '[]'::jsonb) || %s::jsonb WHERE id = %s",
-                (message_json, sender_id),
-            )
-
             return True
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def remove_user(self, user_id: int) -> bool:
         """Remove a user from the users table."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
             cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+            self._forget_id(self._user_id_cache, user_id)
+            self._admin_cache.clear()
             return cursor.rowcount > 0
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
 
     def remove_group(self, group_id: int) -> bool:
         """Remove a group from the groups table."""
+        conn = self._get_connection(database="chat", autocommit=True)
         try:
-            conn = self._get_connection(database="chat", autocommit=True)
             cursor = conn.cursor()
             cursor.execute("DELETE FROM groups WHERE id = %s", (group_id,))
+            self._forget_id(self._group_id_cache, group_id)
             return cursor.rowcount > 0
         except OperationalError as e:
             logger.debug(msg=str(e))
             raise e
+        finally:
+            self._put_connection(conn)
@@ -1,13 +1,16 @@
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
-    QTextEdit,
+    QPlainTextEdit,
     QLineEdit,
     QPushButton,
     QLabel,
 )
 from PyQt5.QtCore import pyqtSignal
 
+# Oldest lines are dropped past this many, bounding memory in long chats
+MAX_CHAT_LINES = 5000
+
 
 class PrivateChatWindow(QWidget):
     send_message = pyqtSignal(str, str, str)
@@ -21,8 +24,9 @@ class PrivateChatWindow(QWidget):
 
         layout = QVBoxLayout()
 
-        self.chat_display = QTextEdit()
+        self.chat_display = QPlainTextEdit()
         self.chat_display.setReadOnly(True)
+        self.chat_display.setMaximumBlockCount(MAX_CHAT_LINES)
         layout.addWidget(QLabel(f"Chat with {target_user}"))
         layout.addWidget(self.chat_display)
 
@@ -46,4 +50,4 @@ class PrivateChatWindow(QWidget):
         self.display_message(f"{sender}: {message}")
 
     def display_message(self, text: str) -> None:
-        self.chat_display.append(text)
+        self.chat_display.appendPlainText(text)